@@ -1,5 +1,6 @@
 
 import requests
+import numpy as np
 import pandas as pd
 import json
 from datetime import datetime
@@ -324,8 +325,213 @@ def merge_csv_files(file_pattern="alchemy_nft_sales_*.csv", output_file="all_nft
         return None
 
 
-def analyze_nft_sales(df=None, filename=None):
-    """分析 NFT 销售数据"""
+def _time_keys(values, is_datetime):
+    """把时间列（或单个时间点）转成可排序的 int64：datetime 转为 UTC 纳秒，区块号原样保留"""
+    values = pd.Series(values) if np.ndim(values) else pd.Series([values])
+    if not is_datetime:
+        return values.astype("int64").to_numpy()
+    ts = pd.to_datetime(values, utc=True).dt.tz_localize(None)
+    return ts.astype("datetime64[ns]").astype("int64").to_numpy()
+
+
+class CollectionSalesIndex:
+    """
+    集合级销售索引：按 (集合, 时间) 排序后预计算前缀和、分桶摘要和区间去重结构，
+    任意集合任意时间区间的 地板价 / 成交量 / 销售数 / 独立买家数 查询无需重扫数据。
+
+    • 销售数、成交量：二分定位区间 + 前缀和，O(log n)
+    • 地板价：每 bucket_size 笔销售一个桶，桶最小值上建稀疏表，O(log n + bucket_size)
+    • 独立买家数：prev[i] = 同集合同买家上一笔销售的位置，区间内 prev < 左端点 的个数即去重数，
+      用归并排序树回答，O(log² n)
+    """
+
+    def __init__(self, df, collection_col="collection_name", time_col="datetime", bucket_size=64):
+        data = df[[collection_col, time_col, "price_eth", "buyer_address"]]
+        data = data[data[collection_col].notna() & (data[collection_col] != "") & data[time_col].notna()]
+
+        self.bucket_size = bucket_size
+        self._time_is_datetime = not pd.api.types.is_numeric_dtype(data[time_col])
+
+        collections = pd.Categorical(data[collection_col])
+        coll_codes = collections.codes.astype(np.int64)
+        times = _time_keys(data[time_col], self._time_is_datetime)
+        order = np.lexsort((times, coll_codes))
+        coll_codes = coll_codes[order]
+        n = len(order)
+
+        self._times = times[order]
+        prices = pd.to_numeric(data["price_eth"], errors="coerce").to_numpy(dtype=np.float64)[order]
+        valid = prices > 0  # 与 analyze_nft_sales 一致，价格 <= 0（非 ETH 交易）不计入价格统计
+        self._floor_prices = np.where(valid, prices, np.inf)
+        self._cum_volume = np.concatenate(([0.0], np.cumsum(np.where(valid, prices, 0.0))))
+
+        # 每个集合在排序数组中的 [start, end)
+        starts = np.searchsorted(coll_codes, np.arange(len(collections.categories)), side="left")
+        ends = np.searchsorted(coll_codes, np.arange(len(collections.categories)), side="right")
+        self._spans = {name: (int(a), int(b)) for name, a, b in zip(collections.categories, starts, ends)}
+
+        self._build_buckets(starts, ends)
+        buyers = pd.Categorical(data["buyer_address"].to_numpy()[order]).codes.astype(np.int64)
+        self._build_distinct_tree(coll_codes, buyers, n)
+
+    @property
+    def collections(self):
+        """已建立索引的集合名称"""
+        return list(self._spans)
+
+    BUCKET_QUANTILES = (0.25, 0.5, 0.75)
+
+    def _build_buckets(self, starts, ends):
+        """每个集合内部按 bucket_size 切桶（桶不跨集合），预计算桶内分位数，并在桶最小值上建稀疏表"""
+        bucket_starts = np.concatenate(
+            [np.arange(a, b, self.bucket_size) for a, b in zip(starts, ends)] or [np.empty(0, np.int64)]
+        ).astype(np.int64)
+        bucket_ends = np.minimum(bucket_starts + self.bucket_size,
+                                 np.repeat(ends, -(-(ends - starts) // self.bucket_size)))
+        self._bucket_starts = bucket_starts
+        self._bucket_ends = bucket_ends
+
+        bucket_mins = (np.minimum.reduceat(self._floor_prices, bucket_starts)
+                       if len(bucket_starts) else np.empty(0))
+        self._sparse = [bucket_mins]
+        width = 1
+        while 2 * width <= len(bucket_mins):
+            prev = self._sparse[-1]
+            self._sparse.append(np.minimum(prev[:-width], prev[width:]))
+            width *= 2
+
+        # 把每个桶的有效价格排好序放进 (桶数, bucket_size) 的矩阵（无效位置为 inf，排在末尾），
+        # 再按 numpy 默认的线性插值一次性算出所有桶的分位数
+        positions = bucket_starts[:, None] + np.arange(self.bucket_size)
+        in_bucket = positions < bucket_ends[:, None]
+        sorted_prices = np.sort(np.where(
+            in_bucket, self._floor_prices[np.minimum(positions, len(self._floor_prices) - 1)], np.inf), axis=1)
+        valid_counts = np.isfinite(sorted_prices).sum(axis=1)
+        rank = np.array(self.BUCKET_QUANTILES)[None, :] * np.maximum(valid_counts - 1, 0)[:, None]
+        lower = np.floor(rank).astype(np.int64)
+        upper = np.ceil(rank).astype(np.int64)
+        rows = np.arange(len(bucket_starts))[:, None]
+        low_values = sorted_prices[rows, lower]
+        high_values = sorted_prices[rows, upper]
+        with np.errstate(invalid="ignore"):
+            quantiles = low_values + (high_values - low_values) * (rank - lower)
+        quantiles[valid_counts == 0] = np.nan
+        self._bucket_quantiles = quantiles
+
+    def _build_distinct_tree(self, coll_codes, buyers, n):
+        """归并排序树：第 k 层把 prev 数组按 2^k 大小的块分别排好序"""
+        positions = np.arange(n)
+        by_key = np.lexsort((positions, buyers, coll_codes))
+        same_key = np.zeros(n, dtype=bool)
+        same_key[1:] = (coll_codes[by_key][1:] == coll_codes[by_key][:-1]) & (buyers[by_key][1:] == buyers[by_key][:-1])
+        prev = np.full(n, -1, dtype=np.int64)
+        prev[by_key[1:][same_key[1:]]] = by_key[:-1][same_key[1:]]
+        prev[buyers < 0] = n  # 缺失买家地址不计入独立买家
+
+        size = 1
+        while size < n:
+            size *= 2
+        level = np.full(size, n, dtype=np.int32 if n < np.iinfo(np.int32).max else np.int64)
+        level[:n] = prev
+        self._tree = [level]
+        width = 1
+        while width < size:
+            width *= 2
+            self._tree.append(np.sort(level.reshape(-1, width), axis=1).ravel())
+
+    def _range(self, collection, start, end):
+        """把 (集合, [start, end]) 转成排序数组上的下标区间 [lo, hi)"""
+        if collection not in self._spans:
+            return 0, 0
+        a, b = self._spans[collection]
+        times = self._times[a:b]
+        lo = a if start is None else a + int(np.searchsorted(times, _time_keys(start, self._time_is_datetime)[0], "left"))
+        hi = b if end is None else a + int(np.searchsorted(times, _time_keys(end, self._time_is_datetime)[0], "right"))
+        return lo, max(lo, hi)
+
+    def _floor(self, lo, hi):
+        bl = int(np.searchsorted(self._bucket_starts, lo, "left"))
+        br = int(np.searchsorted(self._bucket_ends, hi, "right"))
+        if bl >= br:
+            floor = self._floor_prices[lo:hi].min(initial=np.inf)
+        else:
+            k = (br - bl).bit_length() - 1
+            floor = min(self._sparse[k][bl], self._sparse[k][br - (1 << k)],
+                        self._floor_prices[lo:self._bucket_starts[bl]].min(initial=np.inf),
+                        self._floor_prices[self._bucket_ends[br - 1]:hi].min(initial=np.inf))
+        return float(floor) if np.isfinite(floor) else np.nan
+
+    def _unique_buyers(self, lo, hi):
+        total = 0
+        l, r, k = lo, hi, 0
+        while l < r:
+            width = 1 << k
+            if l & 1:
+                total += int(np.searchsorted(self._tree[k][l * width:(l + 1) * width], lo, "left"))
+                l += 1
+            if r & 1:
+                r -= 1
+                total += int(np.searchsorted(self._tree[k][r * width:(r + 1) * width], lo, "left"))
+            l >>= 1
+            r >>= 1
+            k += 1
+        return total
+
+    def query(self, collection, start=None, end=None):
+        """
+        查询集合在 [start, end]（含两端，None 表示不限）内的销售情况
+        :return: dict，包括 sales_count / volume / floor_price / unique_buyers
+        """
+        lo, hi = self._range(collection, start, end)
+        return {
+            "collection": collection,
+            "sales_count": hi - lo,
+            "volume": float(self._cum_volume[hi] - self._cum_volume[lo]),
+            "floor_price": self._floor(lo, hi) if hi > lo else np.nan,
+            "unique_buyers": self._unique_buyers(lo, hi),
+        }
+
+    def bucket_summaries(self, collection):
+        """返回集合的分桶摘要：每 bucket_size 笔销售的时间范围、地板价、分位数和成交量"""
+        a, b = self._spans.get(collection, (0, 0))
+        bl = int(np.searchsorted(self._bucket_starts, a, "left"))
+        br = int(np.searchsorted(self._bucket_ends, b, "right"))
+        bs = self._bucket_starts[bl:br]
+        be = self._bucket_ends[bl:br]
+        floors = self._sparse[0][bl:br]
+        quantiles = self._bucket_quantiles[bl:br]
+        summaries = pd.DataFrame({
+            "start_time": self._times[bs],
+            "end_time": self._times[be - 1],
+            "sales_count": be - bs,
+            "volume": self._cum_volume[be] - self._cum_volume[bs],
+            "floor_price": np.where(np.isfinite(floors), floors, np.nan),
+            "p25": quantiles[:, 0],
+            "median": quantiles[:, 1],
+            "p75": quantiles[:, 2],
+        })
+        if self._time_is_datetime:
+            summaries["start_time"] = pd.to_datetime(summaries["start_time"])
+            summaries["end_time"] = pd.to_datetime(summaries["end_time"])
+        return summaries
+
+
+def build_collection_index(df, collection_col="collection_name"):
+    """为销售数据建立 CollectionSalesIndex；时间戳缺失时退回用区块号作为时间轴"""
+    if "datetime" not in df.columns and "block_timestamp" in df.columns:
+        df = df.assign(datetime=pd.to_datetime(df["block_timestamp"]))
+    if "datetime" in df.columns and df["datetime"].notna().any():
+        time_col = "datetime"
+    else:
+        time_col = "block_number"
+    return CollectionSalesIndex(df, collection_col=collection_col, time_col=time_col)
+
+
+def analyze_nft_sales(df=None, filename=None, build_index=False):
+    """
+    分析 NFT 销售数据
+    build_index=True 时额外建立集合时间索引（占用 O(n log n) 内存），结果放在 "collection_index"
+    """
     try:
         # 如果没有提供DataFrame，从文件读取
         if df is None and filename:
@@ -404,6 +610,15 @@ def analyze_nft_sales(df=None, filename=None):
                 for _, row in collection_prices.iterrows():
                     print(f"- {row['collection_name']}: 平均 {row['mean']:.4f} ETH, 中位数 {row['median']:.4f} ETH")
 
+                # 集合时间索引，供看板按任意集合、任意时间区间查询地板价/成交量/独立买家
+                if build_index:
+                    try:
+                        analysis_results["collection_index"] = build_collection_index(df_valid_collections)
+                        print(f"\n已建立 {len(analysis_results['collection_index'].collections)} 个集合的时间索引")
+                    except Exception as e:
+                        # 索引失败不影响其他分析结果
+                        print(f"建立集合时间索引时出错: {e}")
+
         # 4. 活跃度分析
         if "buyer_address" in df.columns and "seller_address" in df.columns:
             top_buyers = df["buyer_address"].value_counts().head(10).reset_index()
@@ -1,14 +1,19 @@
 
 
 import requests       # 发送 HTTP 请求
+import numpy as np    # 列式缓冲区
 import pandas as pd  # DataFrame 操作
 import csv            # CSV 读写
 import argparse      # 命令行参数解析
+from decimal import Decimal, InvalidOperation, ROUND_DOWN  # 定点价格解析的兜底
 
 # —————— 复杂度分析 ——————
 # 时间复杂度：O(N) 次网络调用，总记录数 N，每次拉 batch_size 条 → N/batch_size 次请求
 # 空间复杂度：
-#   • 内存方案：O(N)，所有数据累积在内存里
+#   • 内存方案：O(N)，但每页立即写入定长类型的列缓冲区（int64 时间戳、地址编码、定点价格），
+#              不再保留原始嵌套 dict，峰值内存接近最终 DataFrame 的大小。
+#              代价：priceETH 只保留到 1e-9 ETH（多余小数位截断），超出 int64 范围或无法解析的
+#              价格/时间戳记为缺失；流式方案仍原样写出 API 返回的字符串，两种方案的 CSV 因此不完全一致
 #   • 流式方案：O(batch_size)，只保存当前批次数据
 
 # —————— 全局配置 ——————
@@ -60,28 +65,186 @@ def fetch_nft_sales(limit: int, skip: int) -> list:
         raise RuntimeError(f"GraphQL Error: {js['errors']}")
     return (js.get("data") or {}).get("orderFulfillments", [])
 
+# —————— 列式缓冲区 ——————
+PRICE_DECIMALS = 9                  # 定点价格精度：1e-9 ETH（gwei），int64 上限约 9.2e9 ETH
+PRICE_SCALE = 10 ** PRICE_DECIMALS
+_MISSING = np.iinfo(np.int64).min   # int64 列的缺失值哨兵，恰好也是 datetime64 的 NaT
+_INT64_MAX = np.iinfo(np.int64).max
+_MAX_TIMESTAMP = _INT64_MAX // 10 ** 9  # build 时要换算成纳秒，超过这个秒数会溢出
+
+
+def _parse_timestamp(value) -> int:
+    """把 UNIX 秒（字符串或数字，如 "1690000000.0"）转成 int，缺失或无法解析时返回哨兵值。"""
+    if value is None or value == "":
+        return _MISSING
+    try:
+        seconds = int(value)
+    except (TypeError, ValueError):
+        try:
+            seconds = int(Decimal(str(value)).to_integral_value(rounding=ROUND_DOWN))
+        except (ValueError, OverflowError, InvalidOperation):
+            return _MISSING
+    return seconds if -_MAX_TIMESTAMP <= seconds <= _MAX_TIMESTAMP else _MISSING
+
+
+def _parse_price_fixed(value) -> int:
+    """
+    把 priceETH 十进制字符串解析成定点整数（单位 1e-9 ETH），全程不经过 float，避免精度损失。
+    超出精度的小数位直接截断；科学计数法等罕见格式退回 Decimal 处理。
+    无法解析（如 "nan"）或超出 int64 范围（常见于 token 精度错误的异常价格）时返回哨兵值，
+    不让单条异常记录中断整个拉取。
+    """
+    if value is None or value == "":
+        return _MISSING
+    s = str(value)
+    whole, _, frac = s.partition(".")
+    try:
+        sign = -1 if whole.startswith("-") else 1
+        fixed = sign * (abs(int(whole or "0")) * PRICE_SCALE + int(frac[:PRICE_DECIMALS].ljust(PRICE_DECIMALS, "0")))
+    except ValueError:
+        try:
+            fixed = int(Decimal(s).scaleb(PRICE_DECIMALS).to_integral_value(rounding=ROUND_DOWN))
+        except (ValueError, OverflowError, InvalidOperation):
+            return _MISSING
+    return fixed if -_INT64_MAX <= fixed <= _INT64_MAX else _MISSING
+
+
+class _GrowableColumn:
+    """
+    一维 numpy 缓冲区，容量不足时按 2 倍扩容，追加均摊 O(1)。
+    """
+
+    def __init__(self, dtype, capacity: int = 1024):
+        self._buf = np.empty(max(capacity, 1), dtype=dtype)
+        self._size = 0
+
+    def extend(self, values: list):
+        end = self._size + len(values)
+        if end > len(self._buf):
+            grown = np.empty(max(end, 2 * len(self._buf)), dtype=self._buf.dtype)
+            grown[:self._size] = self._buf[:self._size]
+            self._buf = grown
+        self._buf[self._size:end] = values
+        self._size = end
+
+    def finish(self) -> np.ndarray:
+        """截掉多余容量并返回底层数组（原地 resize，不额外复制一份）。"""
+        self._buf.resize(self._size, refcheck=False)
+        return self._buf
+
+
+class _Interner:
+    """字符串驻留：同一个值只保存一次，列里只存 int32 编码（缺失为 -1）。"""
+
+    def __init__(self):
+        self._codes = {}
+        self._values = []
+
+    def code(self, value) -> int:
+        if value is None:
+            return -1
+        c = self._codes.get(value)
+        if c is None:
+            c = len(self._values)
+            self._codes[value] = c
+            self._values.append(value)
+        return c
+
+    def categories(self) -> pd.Index:
+        return pd.Index(self._values, dtype=object)
+
+
+class SalesColumnBuilder:
+    """
+    按页把 orderFulfillments 追加进类型化的列缓冲区，最后基本不复制地组装成 DataFrame。
+    • trade.timestamp  → int64 秒，build 时原地换算成 datetime64[ns]
+    • buyer / seller   → 共用一个地址字典，列里只存 int32 编码，输出为 Categorical
+    • priceETH         → int64 定点数（见 PRICE_DECIMALS），输出为 float64 ETH
+    • orderFulfillmentMethod 取值很少，同样编码成 Categorical
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._ids = _GrowableColumn(object, capacity)
+        self._method_codes = _GrowableColumn(np.int32, capacity)
+        self._trade_ids = _GrowableColumn(object, capacity)
+        self._timestamps = _GrowableColumn(np.int64, capacity)
+        self._prices = _GrowableColumn(np.int64, capacity)
+        self._token_ids = _GrowableColumn(object, capacity)
+        self._buyer_codes = _GrowableColumn(np.int32, capacity)
+        self._seller_codes = _GrowableColumn(np.int32, capacity)
+        self._methods = _Interner()
+        self._addresses = _Interner()
+        self._built = False
+
+    def _check_not_built(self):
+        # build 会原地改写时间戳缓冲区，之后再追加或重复 build 都会得到错误数据
+        if self._built:
+            raise RuntimeError("SalesColumnBuilder 已经 build 过，不能继续使用")
+
+    def append_page(self, page: list):
+        """把一页原始记录写入缓冲区；调用方之后即可丢弃 page。"""
+        self._check_not_built()
+        trades = [rec.get("trade") or {} for rec in page]
+        self._ids.extend([rec.get("id") for rec in page])
+        self._method_codes.extend([self._methods.code(rec.get("orderFulfillmentMethod")) for rec in page])
+        self._trade_ids.extend([t.get("id") for t in trades])
+        self._timestamps.extend([_parse_timestamp(t.get("timestamp")) for t in trades])
+        self._prices.extend([_parse_price_fixed(t.get("priceETH")) for t in trades])
+        self._token_ids.extend([t.get("tokenId") for t in trades])
+        self._buyer_codes.extend([self._addresses.code(t.get("buyer")) for t in trades])
+        self._seller_codes.extend([self._addresses.code(t.get("seller")) for t in trades])
+
+    def build(self) -> pd.DataFrame:
+        """
+        组装 DataFrame。时间戳和字符串列直接引用缓冲区数组，不做复制；
+        新分配只有两处：定点价格换算成 float64，以及 pandas 把 Categorical 编码
+        收窄成能容纳类别数的最小整数类型（不超过原 int32 缓冲区大小）。每个 builder 只能 build 一次，
+        之后再调用 build / append_page 会抛出 RuntimeError。
+        """
+        self._check_not_built()
+        self._built = True
+        timestamps = self._timestamps.finish()
+        valid = timestamps != _MISSING
+        timestamps[valid] *= 10 ** 9  # 秒 → 纳秒，原地换算后按 datetime64[ns] 解释
+        prices = self._prices.finish()
+        price_eth = prices / PRICE_SCALE
+        price_eth[prices == _MISSING] = np.nan
+        addresses = self._addresses.categories()
+        return pd.DataFrame({
+            "id": pd.Series(self._ids.finish(), dtype=object, copy=False),
+            "orderFulfillmentMethod": pd.Categorical.from_codes(
+                self._method_codes.finish(), categories=self._methods.categories()),
+            "trade.id": pd.Series(self._trade_ids.finish(), dtype=object, copy=False),
+            "trade.timestamp": timestamps.view("datetime64[ns]"),
+            "trade.priceETH": price_eth,
+            "trade.tokenId": pd.Series(self._token_ids.finish(), dtype=object, copy=False),
+            "trade.buyer": pd.Categorical.from_codes(self._buyer_codes.finish(), categories=addresses),
+            "trade.seller": pd.Categorical.from_codes(self._seller_codes.finish(), categories=addresses),
+        }, copy=False)
+
+
 def fetch_all_to_memory(batch_size: int = 1000) -> pd.DataFrame:
     """
-    内存方案：循环分页拉取，全部累积到列表，再转换成 DataFrame 并返回。
+    内存方案：循环分页拉取，每页直接写入 SalesColumnBuilder 的列缓冲区，最后组装成 DataFrame 返回。
     :param batch_size: 每页大小
     :return:           DataFrame，列包括:
                         ['id','orderFulfillmentMethod',
                          'trade.id','trade.timestamp','trade.priceETH',
                          'trade.tokenId','trade.buyer','trade.seller']
+                       其中 trade.timestamp 为 datetime64，trade.priceETH 为 float64 ETH，
+                       orderFulfillmentMethod / trade.buyer / trade.seller 为 Categorical。
+                       注意 trade.priceETH 精度为 1e-9 ETH（见 PRICE_DECIMALS），不是 API 返回的原始字符串；
+                       超出 int64 定点范围或无法解析的价格、时间戳记为 NaN / NaT
     """
-    all_records = []
+    builder = SalesColumnBuilder(capacity=batch_size)
     skip = 0
     while True:
         page = fetch_nft_sales(limit=batch_size, skip=skip)
         if not page:
             break
-        all_records.extend(page)
+        builder.append_page(page)
         skip += len(page)
-    # 利用 pandas.json_normalize 展开嵌套 dict
-    df = pd.json_normalize(all_records)
-    # 把 UNIX 秒转为 datetime
-    df["trade.timestamp"] = pd.to_datetime(df["trade.timestamp"], unit="s")
-    return df
+    return builder.build()
 
 def stream_all_to_csv(batch_size: int = 1000, filename: str = "all_sales_stream.csv"):
     """
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from Alchemy import CollectionSalesIndex, build_collection_index
+
+
+def _sales(n, seed, time_col="datetime"):
+    rng = np.random.default_rng(seed)
+    times = rng.integers(1_600_000_000, 1_600_100_000, n)
+    return pd.DataFrame({
+        "collection_name": rng.choice(["A", "B", "C", ""], n),
+        time_col: pd.to_datetime(times, unit="s") if time_col == "datetime" else times,
+        "price_eth": rng.choice([-1.0, 0.0, 0.05, 0.3, 1.2, np.nan], n) * rng.random(n),
+        "buyer_address": rng.choice(["0xa", "0xb", "0xc", None] + [f"0x{i}" for i in range(20)], n),
+    })
+
+
+def _expected(df, collection, start, end, time_col="datetime"):
+    """用普通的 pandas 过滤 + groupby 计算基准答案"""
+    sub = df[df["collection_name"] == collection]
+    if start is not None:
+        sub = sub[sub[time_col] >= start]
+    if end is not None:
+        sub = sub[sub[time_col] <= end]
+    prices = sub["price_eth"][sub["price_eth"] > 0]
+    per_collection = sub.groupby("collection_name").agg(
+        sales_count=("price_eth", "size"), unique_buyers=("buyer_address", "nunique"))
+    return {
+        "sales_count": int(per_collection["sales_count"].sum()),
+        "volume": prices.sum(),
+        "floor_price": prices.min() if len(prices) else np.nan,
+        "unique_buyers": int(per_collection["unique_buyers"].sum()),
+    }
+
+
+def _assert_matches(index, df, collection, start, end, time_col="datetime"):
+    got = index.query(collection, start, end)
+    expected = _expected(df, collection, start, end, time_col)
+    assert got["sales_count"] == expected["sales_count"]
+    assert np.isclose(got["volume"], expected["volume"])
+    assert np.isclose(got["floor_price"], expected["floor_price"], equal_nan=True)
+    assert got["unique_buyers"] == expected["unique_buyers"]
+
+
+@pytest.mark.parametrize("bucket_size", [1, 3, 16, 64])
+def test_query_matches_pandas_baseline(bucket_size):
+    df = _sales(500, seed=bucket_size)
+    index = CollectionSalesIndex(df, bucket_size=bucket_size)
+    rng = np.random.default_rng(100 + bucket_size)
+    times = np.sort(df["datetime"].to_numpy())
+    for _ in range(50):
+        # 随机端点落在桶中间，也覆盖跨多个桶和整个集合的区间
+        start, end = sorted(rng.choice(times, 2))
+        _assert_matches(index, df, rng.choice(["A", "B", "C"]), pd.Timestamp(start), pd.Timestamp(end))
+    for collection in ["A", "B", "C"]:
+        _assert_matches(index, df, collection, None, None)
+
+
+def test_query_ranges_aligned_to_bucket_edges():
+    df = _sales(300, seed=7)
+    index = CollectionSalesIndex(df, bucket_size=8)
+    times = np.sort(df.loc[df["collection_name"] == "A", "datetime"].to_numpy())
+    for lo, hi in [(0, 7), (8, 15), (8, 40), (3, 12), (5, 6), (0, len(times) - 1)]:
+        _assert_matches(index, df, "A", pd.Timestamp(times[lo]), pd.Timestamp(times[hi]))
+
+
+def test_unknown_collection_and_empty_range():
+    df = _sales(100, seed=3)
+    index = CollectionSalesIndex(df)
+    result = index.query("missing")
+    assert result["sales_count"] == 0 and result["volume"] == 0 and result["unique_buyers"] == 0
+    assert np.isnan(result["floor_price"])
+    assert index.query("A", pd.Timestamp("2000-01-01"), pd.Timestamp("2000-01-02"))["sales_count"] == 0
+    assert "" not in index.collections
+
+
+def test_empty_frame():
+    index = CollectionSalesIndex(_sales(0, seed=0))
+    assert index.collections == []
+    assert index.query("A")["sales_count"] == 0
+    assert index.bucket_summaries("A").empty
+
+
+def test_block_number_fallback():
+    df = _sales(400, seed=11, time_col="block_number")
+    df["datetime"] = pd.NaT
+    index = build_collection_index(df)
+    _assert_matches(index, df, "A", 1_600_020_000, 1_600_080_000, time_col="block_number")
+    _assert_matches(index, df, "B", None, 1_600_050_000, time_col="block_number")
+
+
+def test_bucket_summaries_match_per_bucket_quantiles():
+    df = _sales(400, seed=5)
+    index = CollectionSalesIndex(df, bucket_size=10)
+    summaries = index.bucket_summaries("A")
+    sales = df[df["collection_name"] == "A"].sort_values("datetime", kind="stable")
+    assert summaries["sales_count"].sum() == len(sales)
+    for i, start in enumerate(range(0, len(sales), 10)):
+        prices = sales["price_eth"].iloc[start:start + 10]
+        prices = prices[prices > 0]
+        for column, q in [("floor_price", 0.0), ("p25", 0.25), ("median", 0.5), ("p75", 0.75)]:
+            expected = np.quantile(prices, q) if len(prices) else np.nan
+            assert np.isclose(summaries[column].iloc[i], expected, equal_nan=True)
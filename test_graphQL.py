@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from graphQL import SalesColumnBuilder
+
+
+def _record(i, timestamp, price):
+    return {
+        "id": f"f{i}",
+        "orderFulfillmentMethod": "BASIC",
+        "trade": {"id": f"t{i}", "timestamp": timestamp, "priceETH": price,
+                  "tokenId": "1", "buyer": "0xa", "seller": "0xb"},
+    }
+
+
+def test_build_tolerates_bad_prices_and_timestamps():
+    builder = SalesColumnBuilder(capacity=2)
+    builder.append_page([
+        _record(0, "1690000000", "0.0123456789123"),
+        _record(1, "1690000000.0", "1e30"),
+        _record(2, "not-a-time", "nan"),
+        _record(3, "1e30", "-1e30"),
+    ])
+    df = builder.build()
+
+    assert len(df) == 4
+    assert df["trade.priceETH"].iloc[0] == 0.012345678
+    assert df["trade.priceETH"].iloc[1:].isna().all()
+    assert df["trade.timestamp"].iloc[0] == df["trade.timestamp"].iloc[1]
+    assert df["trade.timestamp"].iloc[2:].isna().all()
+    assert np.issubdtype(df["trade.timestamp"].dtype, np.datetime64)
+
+
+def _page(start, n):
+    return [{
+        "id": f"f{i}",
+        "orderFulfillmentMethod": None if i == 3 else "BASIC",
+        "trade": {"id": f"t{i}", "timestamp": str(1690000000 + i), "priceETH": f"{i}.5",
+                  "tokenId": str(i), "buyer": None if i == 4 else f"0x{i % 3}", "seller": f"0x{(i + 1) % 3}"},
+    } for i in range(start, start + n)]
+
+
+def test_build_appends_pages_in_order_without_copying():
+    builder = SalesColumnBuilder(capacity=2)
+    for start, n in [(0, 3), (3, 1), (4, 5)]:
+        builder.append_page(_page(start, n))
+    df = builder.build()
+
+    assert df["id"].tolist() == [f"f{i}" for i in range(9)]
+    assert df["trade.tokenId"].tolist() == [str(i) for i in range(9)]
+    expected_ts = pd.to_datetime([1690000000 + i for i in range(9)], unit="s")
+    assert (df["trade.timestamp"].to_numpy() == expected_ts.to_numpy()).all()
+    assert df["trade.priceETH"].tolist() == [i + 0.5 for i in range(9)]
+
+    assert df["trade.buyer"].cat.categories.equals(df["trade.seller"].cat.categories)
+    assert df["trade.buyer"].isna().tolist() == [i == 4 for i in range(9)]
+    assert df["orderFulfillmentMethod"].isna().tolist() == [i == 3 for i in range(9)]
+    assert df["trade.buyer"].iloc[5] == "0x2"
+
+    assert np.shares_memory(df["trade.timestamp"].to_numpy(), builder._timestamps._buf)
+    assert np.shares_memory(df["id"].to_numpy(), builder._ids._buf)
+    assert np.shares_memory(df["trade.id"].to_numpy(), builder._trade_ids._buf)
+    assert np.shares_memory(df["trade.tokenId"].to_numpy(), builder._token_ids._buf)
+
+
+def test_builder_cannot_be_reused_after_build():
+    builder = SalesColumnBuilder()
+    builder.append_page(_page(0, 2))
+    builder.build()
+    with pytest.raises(RuntimeError):
+        builder.build()
+    with pytest.raises(RuntimeError):
+        builder.append_page(_page(2, 1))